@@ -1,8 +1,17 @@
-from flask import Flask, render_template, request, redirect
+from flask import Flask, Response, render_template, request, redirect, jsonify, send_file
 import tree
+import metrics
+import layout
+import coalesce
+import catalog
+import levels
 import json
 import os
+import io
+from queue import Queue, Empty
 from collections import deque
+from urllib.parse import quote, urlencode
+from urllib.request import urlopen
 
 app = Flask(__name__)
 
@@ -16,8 +25,19 @@ current_root = None
 current_name = None
 current_n = 0
 current_used = set()
+layouts = {}     # name -> layout.TreeLayout (positions gardées entre deux éditions)
+listeners = {}   # name -> [Queue] des pages graphe ouvertes (SSE)
+tree_versions = {}  # name -> compteur incrémenté à chaque modification
+flight = coalesce.SingleFlight()
+index = catalog.Catalog(lambda name: tree.stats(trees[name]))
+level_indexes = {}  # name -> (version, levels.LevelIndex)
+metric_arrays = {}  # name -> (version, metrics.tree_to_arrays(...))
+PAGE_SIZE = 50
 
-DATA_FILE = "trees.json"
+DATA_FILE = os.environ.get("TREELAB_DATA", "trees.json")
+
+# mode réparti (shard.py) : URLs des autres shards
+PEERS = [p for p in os.environ.get("TREELAB_PEERS", "").split(",") if p]
 
 # =========================
 # OUTILS ARBRE
@@ -90,6 +110,68 @@ def layout_tree_svg(root, order=None, x_spacing=120, y_spacing=120, top_margin=6
     max_y = max(n["y"] for n in nodes)
     return nodes, edges, int(max_x + 150), int(max_y + 200)
 
+def get_layout(name):
+    lay = layouts.get(name)
+    if lay is None or lay.root is not trees.get(name):
+        lay = layouts[name] = layout.TreeLayout(trees[name])
+    return lay
+
+
+def tree_changed(name, touched=(), removed=()):
+    """
+    Après une modification de l'arbre name : met à jour son layout
+    incrémental et pousse le patch JSON aux pages graphe ouvertes.
+    touched / removed : nœuds concernés, voir TreeLayout.apply.
+    """
+    tree_versions[name] = tree_versions.get(name, 0) + 1
+    level_indexes.pop(name, None)  # reconstruit à la prochaine requête de niveau
+    metric_arrays.pop(name, None)
+    if name in trees:
+        index.touch(name, tree_orders.get(name, 0))
+    else:
+        index.remove(name)
+
+    lay = layouts.get(name)
+    if lay is None:
+        return
+    patch = None
+    if lay.root is trees.get(name):
+        patch = lay.apply(touched, removed)
+    if patch is None:
+        # arbre remplacé ou layout périmé : on repart de zéro
+        del layouts[name]
+        lay = get_layout(name) if name in trees else None
+        if lay is None:
+            return
+        nodes, _, w, h = lay.svg()
+        patch = {"nodes": nodes, "removed": [], "w": w, "h": h, "reset": True}
+    index.set_stats(name, *lay.stats())
+    if patch["nodes"] or patch["removed"] or patch.get("reset"):
+        for q in listeners.get(name, []):
+            q.put(patch)
+
+def shared(name, op, params, fn):
+    """Calcul fn() partagé entre les requêtes simultanées identiques sur la même version de name."""
+    return flight.do((name, tree_versions.get(name, 0), op, params), fn)
+
+def get_levels(name):
+    """Index des niveaux de name pour sa version courante."""
+    v = tree_versions.get(name, 0)
+    cur = level_indexes.get(name)
+    if cur is None or cur[0] != v:
+        lix = shared(name, "levels", (), lambda: levels.LevelIndex(trees[name]))
+        cur = level_indexes[name] = (v, lix)
+    return cur[1]
+
+def get_metric_arrays(name):
+    """Tableaux de metrics.tree_to_arrays pour la version courante de name."""
+    v = tree_versions.get(name, 0)
+    cur = metric_arrays.get(name)
+    if cur is None or cur[0] != v:
+        arr = shared(name, "arrays", (), lambda: metrics.tree_to_arrays(trees[name]))
+        cur = metric_arrays[name] = (v, arr)
+    return cur[1]
+
 # =========================
 # JSON
 # =========================
@@ -113,6 +195,7 @@ def save_trees():
         json.dump({
             name: {
                 "order": tree_orders[name],
+                "modified": index.meta[name]["modified"],
                 "tree": node_to_dict(trees[name])
             } for name in trees
         }, f, ensure_ascii=False, indent=2)
@@ -126,10 +209,49 @@ def load_trees():
             for name, data in raw.items():
                 trees[name] = dict_to_node(data["tree"])
                 tree_orders[name] = data["order"]
+                index.touch(name, data["order"], *tree.stats(trees[name]),
+                            modified=data.get("modified"))
 
 
 load_trees()
 
+
+def catalog_page(prefix="", after="", limit=PAGE_SIZE, local=False):
+    """
+    Une page du catalogue triée par nom (tous les shards sauf si local).
+    Retourne (entrées, curseur de la page suivante ou None).
+    """
+    items = index.page(prefix, after, limit)
+    if not local and PEERS:
+        qs = urlencode({"prefix": prefix, "after": after, "limit": limit, "local": 1})
+        for peer in PEERS:
+            try:
+                with urlopen(f"{peer}/api/trees?{qs}", timeout=2) as r:
+                    items += json.load(r)["items"]
+            except OSError:
+                pass
+        items = sorted(items, key=lambda m: m["name"])[:limit]
+    nxt = items[-1]["name"] if len(items) == limit else None
+    return items, nxt
+
+
+def on_other_shard(name):
+    """En mode réparti : True si l'arbre name existe sur un autre shard."""
+    for peer in PEERS:
+        try:
+            with urlopen(f"{peer}/api/trees/{quote(name, safe='')}", timeout=2):
+                return True
+        except OSError:  # 404 compris (HTTPError)
+            pass
+    return False
+
+
+def listing():
+    """Arguments de template pour les pages qui listent les arbres (?prefix=&after=)."""
+    prefix = request.args.get("prefix", "").strip()
+    items, nxt = catalog_page(prefix, request.args.get("after", ""))
+    return {"items": items, "next": nxt, "prefix": prefix}
+
 # =========================
 # ROUTES
 # =========================
@@ -137,9 +259,28 @@ load_trees()
 def home():
     return render_template("index.html")
 
+@app.route("/stats/coalesce")
+def coalesce_stats():
+    return jsonify(flight.stats())
+
+@app.route("/api/trees")
+def api_trees():
+    limit = min(max(request.args.get("limit", PAGE_SIZE, type=int), 1), 500)
+    items, nxt = catalog_page(request.args.get("prefix", "").strip(),
+                              request.args.get("after", ""), limit,
+                              local=bool(request.args.get("local")))
+    return jsonify({"items": items, "next": nxt})
+
+@app.route("/api/trees/<name>")
+def api_tree(name):
+    m = index.get(name)
+    if m is None:
+        return jsonify({"error": "Arbre non trouvé."}), 404
+    return jsonify(m)
+
 @app.route("/menu")
 def menu():
-    return render_template("menu.html", names=sorted(trees.keys()))
+    return render_template("menu.html")
 
 @app.route("/build", methods=["GET", "POST"])
 def build():
@@ -168,6 +309,7 @@ def build():
         trees[current_name] = current_root
         tree_orders[current_name] = current_n
 
+        tree_changed(current_name)
         save_trees()
         nodes, edges, w, h = layout_tree_svg(current_root)
         current_root = None
@@ -192,15 +334,15 @@ def height_of_tree(node):
 @app.route("/height", methods=["GET", "POST"])
 def height_page():
     if request.method == "GET":
-       return render_template("height_list.html", names=sorted(trees.keys()), msg=None)
+       return render_template("height_list.html", msg=None, **listing())
 
     name = request.form.get("name", "").strip()
     t = trees.get(name)
 
     if not t:
-      return render_template("height_list.html", names=sorted(trees.keys()), msg="❌ Arbre non trouvé.")
+      return render_template("height_list.html", msg="❌ Arbre non trouvé.", **listing())
 
-    h = height_of_tree(t)
+    h = shared(name, "height", (), lambda: height_of_tree(t))
     return render_template("height_result.html", name=name, height=h)
 
 
@@ -214,10 +356,38 @@ def height_page():
 @app.route("/show_graph", methods=["GET", "POST"])
 def show_graph():
     if request.method == "POST":
-        t = trees.get(request.form["name"])
-        nodes, edges, w, h = layout_tree_svg(t)
-        return render_template("show_graph.html", nodes=nodes, edges=edges, w=w, h=h, name="Arbre")
-    return render_template("select_tree.html", names=sorted(trees.keys()))
+        name = request.form["name"]
+        if name not in trees:
+            nodes, edges, w, h = layout_tree_svg(None)
+            return render_template("show_graph.html", nodes=nodes, edges=edges, w=w, h=h, name="Arbre")
+        nodes, edges, w, h = shared(name, "layout", (), lambda: get_layout(name).svg())
+        return render_template("show_graph.html", nodes=nodes, edges=edges, w=w, h=h, name="Arbre",
+                               live=name)
+    return render_template("select_tree.html", **listing())
+
+@app.route("/events/<name>")
+def graph_events(name):
+    """Flux SSE : un patch JSON par modification de l'arbre name."""
+    q = Queue()
+    listeners.setdefault(name, []).append(q)
+
+    def stream():
+        try:
+            while True:
+                try:
+                    patch = q.get(timeout=15)
+                except Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {json.dumps(patch, ensure_ascii=False)}\n\n"
+        finally:
+            listeners[name].remove(q)
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache"})
+
+def traversal(t, mode):
+    return tree.bfs(t) if mode == "bfs" else tree.dfs(t)
 
 @app.route("/show_graph_traversal", methods=["POST"])
 def show_graph_traversal():
@@ -226,13 +396,15 @@ def show_graph_traversal():
     t = trees.get(name)
 
     if mode == "bfs":
-        order = tree.bfs(t)
         title = "Parcours en largeur"
     else:
-        order = tree.dfs(t)
         title = "Parcours en profondeur"
 
-    nodes, edges, w, h = layout_tree_svg(t, order=order)
+    def compute():
+        order = shared(name, "traversal", (mode,), lambda: traversal(t, mode))
+        return layout_tree_svg(t, order=order)
+
+    nodes, edges, w, h = shared(name, "traversal_graph", (mode,), compute)
     return render_template("show_graph.html", nodes=nodes, edges=edges, w=w, h=h, name=title)
 @app.route("/show_traversal_text", methods=["POST"])
 def show_traversal_text():
@@ -241,11 +413,10 @@ def show_traversal_text():
     t = trees.get(name)
 
     if mode == "bfs":
-        order = tree.bfs(t)
         title = "Parcours en largeur (texte)"
     else:
-        order = tree.dfs(t)
         title = "Parcours en profondeur (texte)"
+    order = shared(name, "traversal", (mode,), lambda: traversal(t, mode))
 
     return render_template("show_traversal_text.html", name=name, title=title, order=order)
 @app.route("/insert", methods=["GET","POST"])
@@ -268,6 +439,8 @@ def insert_node():
             if t:
                 ok, msg = tree.insert(t, parent, new, ordre)
                 if ok:
+                    # même nœud que celui choisi par tree.insert
+                    tree_changed(name, touched=[tree.search(t, parent)])
                     save_trees()
 
         # ========== AFFICHER ==========
@@ -275,16 +448,16 @@ def insert_node():
             name = request.form["name"]
             t = trees.get(name)
             if t:
-                nodes, edges, w, h = layout_tree_svg(t)
+                nodes, edges, w, h = get_layout(name).svg()
 
     return render_template(
         "insert.html",
-        names=sorted(trees.keys()),
         msg=msg,
         nodes=nodes,
         edges=edges,
         w=w,
-        h=h
+        h=h,
+        **listing()
     )
 
 
@@ -412,7 +585,6 @@ def search_home():
 def search_word():
     if request.method == "GET":
         return render_template("search_word.html",
-                               names=sorted(trees.keys()),
                                selected_tree=None,
                                msg=None,
                                result=None)
@@ -423,14 +595,12 @@ def search_word():
 
     if not t:
         return render_template("search_word.html",
-                               names=sorted(trees.keys()),
                                selected_tree=tree_name,
                                msg="❌ Arbre non trouvé.",
                                result=None)
 
     if len(value) > 20:
         return render_template("search_word.html",
-                               names=sorted(trees.keys()),
                                selected_tree=tree_name,
                                msg="⚠️ Mot trop long (≤ 20).",
                                result=None)
@@ -438,14 +608,12 @@ def search_word():
     node = find_node_by_value(t, value)
     if not node:
         return render_template("search_word.html",
-                               names=sorted(trees.keys()),
                                selected_tree=tree_name,
                                msg=f"❌ '{value}' introuvable.",
                                result=None)
 
     addr = node_address(t, node)
     return render_template("search_word.html",
-                           names=sorted(trees.keys()),
                            selected_tree=tree_name,
                            msg="✅ Trouvé.",
                            result={"value": value, "addr": addr})
@@ -455,7 +623,6 @@ def search_word():
 def search_path():
     if request.method == "GET":
         return render_template("search_path.html",
-                               names=sorted(trees.keys()),
                                selected_tree=None,
                                msg=None,
                                path=None,
@@ -468,7 +635,6 @@ def search_path():
 
     if not t:
         return render_template("search_path.html",
-                               names=sorted(trees.keys()),
                                selected_tree=tree_name,
                                msg="❌ Arbre non trouvé.",
                                path=None,
@@ -479,7 +645,6 @@ def search_path():
 
     if not a or not b:
         return render_template("search_path.html",
-                               names=sorted(trees.keys()),
                                selected_tree=tree_name,
                                msg="❌ 'a' ou 'b' introuvable dans l’arbre.",
                                path=None,
@@ -488,7 +653,6 @@ def search_path():
     nodes_path = path_nodes_between(t, a, b)
     if not nodes_path:
         return render_template("search_path.html",
-                               names=sorted(trees.keys()),
                                selected_tree=tree_name,
                                msg="❌ Impossible de calculer le chemin.",
                                path=None,
@@ -496,7 +660,6 @@ def search_path():
 
     path = [{"value": nd.value, "addr": node_address(t, nd)} for nd in nodes_path]
     return render_template("search_path.html",
-                           names=sorted(trees.keys()),
                            selected_tree=tree_name,
                            msg="✅ Chemin trouvé.",
                            path=path,
@@ -569,8 +732,7 @@ def delete_node_by_value(root, value):
 def edit_node():
     msg = None
     if request.method == "GET":
-        return render_template("edit.html", names=sorted(trees.keys()),
-                               selected_tree=None, msg=None)
+        return render_template("edit.html", selected_tree=None, msg=None)
 
     tree_name = request.form.get("tree_name", "").strip()
     old_val = request.form.get("old_val", "").strip()
@@ -578,28 +740,24 @@ def edit_node():
 
     t = trees.get(tree_name)
     if not t:
-        return render_template("edit.html", names=sorted(trees.keys()),
-                               selected_tree=tree_name, msg="❌ Arbre non trouvé.")
+        return render_template("edit.html", selected_tree=tree_name, msg="❌ Arbre non trouvé.")
 
     if not old_val or not new_val:
-        return render_template("edit.html", names=sorted(trees.keys()),
-                               selected_tree=tree_name, msg="⚠️ Champs vides.")
+        return render_template("edit.html", selected_tree=tree_name, msg="⚠️ Champs vides.")
 
     node = find_node_by_value(t, old_val)
     if not node:
-        return render_template("edit.html", names=sorted(trees.keys()),
-                               selected_tree=tree_name, msg="❌ Nœud introuvable.")
+        return render_template("edit.html", selected_tree=tree_name, msg="❌ Nœud introuvable.")
 
     # Empêcher doublon (valeurs uniques)
     already = find_node_by_value(t, new_val)
     if already and already is not node:
-        return render_template("edit.html", names=sorted(trees.keys()),
-                               selected_tree=tree_name, msg="❌ Nouvelle valeur déjà utilisée.")
+        return render_template("edit.html", selected_tree=tree_name, msg="❌ Nouvelle valeur déjà utilisée.")
 
     node.value = new_val
+    tree_changed(tree_name, touched=[node])
     save_trees()
-    return render_template("edit.html", names=sorted(trees.keys()),
-                           selected_tree=tree_name, msg="✅ Nœud modifié avec succès.")
+    return render_template("edit.html", selected_tree=tree_name, msg="✅ Nœud modifié avec succès.")
 
 
 
@@ -656,7 +814,6 @@ def delete_node():
     if request.method == "GET":
         return render_template(
             "delete.html",
-            names=sorted(trees.keys()),
             selected_tree=None,
             msg=None
         )
@@ -668,21 +825,21 @@ def delete_node():
     if not t:
         return render_template(
             "delete.html",
-            names=sorted(trees.keys()),
             selected_tree=tree_name,
             msg="❌ Arbre non trouvé."
         )
 
     # ✅ suppression du nœud seulement (on garde les enfants)
+    node = find_parent_and_node(t, value)[1]
     new_root, ok, msg = delete_node_keep_children(t, value)
 
     if ok:
         trees[tree_name] = new_root
+        tree_changed(tree_name, removed=[node])
         save_trees()
 
     return render_template(
         "delete.html",
-        names=sorted(trees.keys()),
         selected_tree=tree_name,
         msg=msg
     )
@@ -691,5 +848,145 @@ def delete_node():
 
 
 
+@app.route("/restructure", methods=["GET", "POST"])
+def restructure():
+    if request.method == "GET":
+        return render_template("restructure.html", selected_tree=None, msg=None)
+
+    op = request.form.get("op", "")
+    tree_name = request.form.get("tree_name", "").strip()
+    value = request.form.get("value", "").strip()
+    target = request.form.get("target", "").strip()
+
+    t = trees.get(tree_name)
+    if not t:
+        return render_template("restructure.html", selected_tree=tree_name, msg="❌ Arbre non trouvé.")
+
+    ordre = tree_orders.get(tree_name, 0)
+
+    if op == "move":
+        # nœuds résolus comme dans move_subtree, avant le déplacement
+        node, dest = tree.find_with_links(t, value)[2], tree.search(t, target)
+        ok, msg = tree.move_subtree(t, value, target, ordre)
+        if ok:
+            tree_changed(tree_name, touched=[node, dest])
+
+    elif op == "copy":
+        dst_name = request.form.get("dst_tree", "").strip() or tree_name
+        dst = trees.get(dst_name)
+        if not dst:
+            if on_other_shard(dst_name):
+                msg = f"❌ {tree_name} et {dst_name} sont sur des shards différents : copie impossible."
+            else:
+                msg = "❌ Arbre destination non trouvé."
+            return render_template("restructure.html", selected_tree=tree_name, msg=msg)
+        suffix = request.form.get("suffix", "").strip()
+        ok, msg = tree.copy_subtree(t, value, dst, target, tree_orders.get(dst_name, 0), suffix)
+        if ok:
+            tree_changed(dst_name, touched=[tree.search(dst, target)])
+
+    elif op == "graft":
+        other_name = request.form.get("other_tree", "").strip()
+        other = trees.get(other_name)
+        if not other and other_name and on_other_shard(other_name):
+            msg = f"❌ {tree_name} et {other_name} sont sur des shards différents : greffe impossible."
+            return render_template("restructure.html", selected_tree=tree_name, msg=msg)
+        if not other or other_name == tree_name:
+            return render_template("restructure.html", selected_tree=tree_name, msg="❌ Arbre à greffer invalide.")
+        ok, msg = tree.graft_tree(t, target, other, ordre)
+        if ok:
+            # l'arbre greffé fait désormais partie de tree_name
+            del trees[other_name]
+            del tree_orders[other_name]
+            tree_changed(other_name)
+            tree_changed(tree_name, touched=[tree.search(t, target)])
+
+    else:
+        ok, msg = False, "⚠️ Opération inconnue."
+
+    if ok:
+        save_trees()
+
+    return render_template("restructure.html", selected_tree=tree_name, msg=msg)
+
+
+
+
+
+@app.route("/metrics", methods=["GET", "POST"])
+def metrics_export():
+    if request.method == "GET":
+        return render_template("metrics.html", msg=None)
+
+    name = request.form.get("name", "").strip()
+    fmt = request.form.get("fmt", "csv")
+    t = trees.get(name)
+    if not t:
+        return render_template("metrics.html", msg="❌ Arbre non trouvé.")
+
+    cols = metrics.node_metrics(t, address=bool(request.form.get("address")),
+                                arrays=get_metric_arrays(name))
+    if fmt == "npz":
+        buf = io.BytesIO()
+        metrics.to_npz(cols, buf)
+    else:
+        fmt = "csv"
+        txt = io.StringIO()
+        metrics.to_csv(cols, txt)
+        buf = io.BytesIO(txt.getvalue().encode("utf-8"))
+    buf.seek(0)
+    return send_file(buf, as_attachment=True, download_name=f"{name}_metrics.{fmt}")
+
+
+
+
+
+@app.route("/levels", methods=["GET", "POST"])
+def level_queries():
+    if request.method == "GET":
+        return render_template("levels.html", selected_tree=None, msg=None, rows=None)
+
+    op = request.form.get("op", "")
+    tree_name = request.form.get("tree_name", "").strip()
+    value = request.form.get("value", "").strip()
+    if tree_name not in trees:
+        return render_template("levels.html", selected_tree=tree_name, msg="❌ Arbre non trouvé.", rows=None)
+
+    try:
+        nums = [int(request.form.get(f, "0") or 0) for f in ("depth", "k", "a", "b")]
+    except ValueError:
+        return render_template("levels.html", selected_tree=tree_name, msg="⚠️ Nombre invalide.", rows=None)
+    depth, k, a, b = nums
+
+    lix = get_levels(tree_name)
+    rows = None
+
+    if op == "level":
+        rows = [(depth, lix.level(depth))]
+        msg = f"✅ {len(rows[0][1])} nœud(s) à la profondeur {depth}."
+
+    elif op == "ancestor":
+        if lix.depth_of(value) is None:
+            msg = f"❌ '{value}' introuvable."
+        else:
+            anc = lix.ancestor(value, k)
+            msg = f"✅ Ancêtre {k} de {value} : {anc}" if anc is not None else f"❌ {value} n'a pas d'ancêtre {k}."
+
+    elif op == "range":
+        rows = lix.depth_range(value or trees[tree_name].value, a, b)
+        if rows is None:
+            msg = f"❌ '{value}' introuvable."
+        else:
+            msg = f"✅ {sum(len(vs) for _, vs in rows)} nœud(s) entre les profondeurs {a} et {b}."
+
+    else:
+        msg = "⚠️ Opération inconnue."
+
+    return render_template("levels.html", selected_tree=tree_name, msg=msg, rows=rows)
+
+
+
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,64 @@
+import argparse
+import random
+import threading
+import time
+
+import app
+import tree
+from coalesce import SingleFlight
+
+# =========================
+# BENCHMARK : requêtes simultanées identiques
+# =========================
+# V « spectateurs » demandent en même temps la mise en page du même arbre,
+# R fois de suite ; sans regroupement chacun refait le calcul.
+
+
+def random_tree(size, order, seed=0):
+    rng = random.Random(seed)
+    nodes = [tree.Node("n0")]
+    open_nodes = [nodes[0]]
+    for i in range(1, size):
+        parent = rng.choice(open_nodes)
+        nodes.append(tree.add_child(parent, f"n{i}"))
+        open_nodes.append(nodes[-1])
+        if tree.count_children(parent) >= order:
+            open_nodes.remove(parent)
+    return nodes[0]
+
+
+def run(viewers, rounds, fn):
+    barrier = threading.Barrier(viewers)
+
+    def viewer():
+        for r in range(rounds):
+            barrier.wait()
+            fn(r)
+
+    threads = [threading.Thread(target=viewer) for _ in range(viewers)]
+    start = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, default=3000)
+    ap.add_argument("--order", type=int, default=4)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    root = random_tree(args.size, args.order)
+    print(f"arbre de {args.size} nœuds, {args.rounds} tours")
+    for viewers in (1, 2, 4, 8, 16):
+        plain = run(viewers, args.rounds, lambda r: app.layout_tree_svg(root))
+        flight = SingleFlight()
+        # la version change à chaque tour, comme après une modification
+        shared = run(viewers, args.rounds,
+                     lambda r: flight.do(("bench", r, "layout", ()), lambda: app.layout_tree_svg(root)))
+        st = flight.stats()
+        print(f"{viewers:3d} spectateurs : sans {plain:6.2f}s  avec {shared:6.2f}s  "
+              f"(x{plain / shared:.1f}, taux de regroupement {st['hit_rate']:.0%})")
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from multiprocessing import Pool, Process
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import shard
+
+# =========================
+# TEST DE CHARGE LOCAL (mode réparti)
+# =========================
+# Débit de /show_graph via le routeur pour 1, 2, 4... shards.
+
+
+def random_tree(prefix, size, order, rng):
+    root = {"value": f"{prefix}0", "children": []}
+    open_nodes = [root]
+    for i in range(1, size):
+        parent = rng.choice(open_nodes)
+        child = {"value": f"{prefix}{i}", "children": []}
+        parent["children"].append(child)
+        open_nodes.append(child)
+        if len(parent["children"]) >= order:
+            open_nodes.remove(parent)
+    return root
+
+
+def write_data(data_dir, n, names, size, order):
+    rng = random.Random(0)
+    parts = [{} for _ in range(n)]
+    for name in names:
+        parts[shard.shard_for(name, n)][name] = {
+            "order": order, "tree": random_tree(name + "_", size, order, rng)}
+    for i, part in enumerate(parts):
+        with open(shard.data_file(data_dir, i), "w", encoding="utf-8") as f:
+            json.dump(part, f)
+
+
+def client(args):
+    port, names, duration, seed = args
+    rng = random.Random(seed)
+    url = f"http://{shard.HOST}:{port}/show_graph"
+    done = 0
+    end = time.time() + duration
+    while time.time() < end:
+        body = urlencode({"name": rng.choice(names)}).encode()
+        with urlopen(url, data=body, timeout=60) as r:
+            r.read()
+        done += 1
+    return done
+
+
+def run(n, port, names, args):
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_data(data_dir, n, names, args.size, args.order)
+        procs, ports = shard.start_shards(n, port, data_dir, quiet=True)
+        router = Process(target=shard.run_router, args=(port, ports, True), daemon=True)
+        router.start()
+        shard.wait_ready(port)
+        try:
+            jobs = [(port, names, args.duration, s) for s in range(args.clients)]
+            with Pool(args.clients) as pool:
+                total = sum(pool.map(client, jobs))
+        finally:
+            router.terminate()
+            for p in procs:
+                p.terminate()
+    return total / args.duration
+
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-shards", type=int, default=cpus)
+    ap.add_argument("--trees", type=int, default=32)
+    ap.add_argument("--size", type=int, default=1500)
+    ap.add_argument("--order", type=int, default=4)
+    ap.add_argument("--clients", type=int, default=2 * cpus)
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--port", type=int, default=5100)
+    args = ap.parse_args()
+
+    names = [f"T{i}" for i in range(args.trees)]
+    counts = []
+    n = 1
+    while n <= args.max_shards:
+        counts.append(n)
+        n *= 2
+
+    base = None
+    for k, n in enumerate(counts):
+        rps = run(n, args.port + 100 * k, names, args)
+        base = base or rps
+        print(f"{n:3d} shard(s) : {rps:8.1f} req/s  (x{rps / base:.2f})")
@@ -0,0 +1,62 @@
+import bisect
+import time
+
+# =========================
+# CATALOGUE DES ARBRES
+# =========================
+# Index trié des noms + métadonnées par arbre. Une page (préfixe, curseur)
+# coûte O(log T + taille de la page) au lieu de trier tous les noms.
+
+
+class Catalog:
+    def __init__(self, stats):
+        # stats(name) -> (nb de nœuds, hauteur), appelé seulement si périmé
+        self.stats = stats
+        self.names = []   # triés
+        self.meta = {}    # name -> {"name", "order", "nodes", "height", "modified"}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.meta
+
+    def touch(self, name, order, nodes=None, height=None, modified=None):
+        """Ajoute ou met à jour name ; nodes/height à None = à recalculer."""
+        if name not in self.meta:
+            bisect.insort(self.names, name)
+        self.meta[name] = {
+            "name": name,
+            "order": order,
+            "nodes": nodes,
+            "height": height,
+            "modified": modified if modified is not None else time.time(),
+        }
+
+    def set_stats(self, name, nodes, height):
+        m = self.meta.get(name)
+        if m is not None:
+            m["nodes"], m["height"] = nodes, height
+
+    def remove(self, name):
+        if self.meta.pop(name, None) is not None:
+            i = bisect.bisect_left(self.names, name)
+            del self.names[i]
+
+    def get(self, name):
+        m = self.meta.get(name)
+        if m is not None and m["nodes"] is None:
+            self.set_stats(name, *self.stats(name))
+        return m
+
+    def page(self, prefix="", after="", limit=50):
+        """Entrées dont le nom commence par prefix, strictement après after, triées."""
+        lo = bisect.bisect_left(self.names, prefix)
+        if after:
+            lo = max(lo, bisect.bisect_right(self.names, after))
+        res = []
+        for name in self.names[lo:lo + limit]:
+            if not name.startswith(prefix):
+                break  # noms triés : les préfixés sont contigus
+            res.append(dict(self.get(name)))
+        return res
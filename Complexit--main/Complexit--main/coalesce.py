@@ -0,0 +1,61 @@
+import threading
+
+# =========================
+# REGROUPEMENT DES REQUÊTES IDENTIQUES (single-flight)
+# =========================
+# Si plusieurs requêtes demandent en même temps le même calcul (même clé),
+# une seule le lance ; les autres attendent et partagent son résultat.
+# Rien n'est gardé après la fin du calcul : la clé contient la version de
+# l'arbre, donc un arbre modifié donne une nouvelle clé.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.hits = 0     # requêtes servies par un calcul déjà en cours
+        self.misses = 0   # calculs réellement lancés
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "in_flight": len(self.calls),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
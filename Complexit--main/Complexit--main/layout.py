@@ -0,0 +1,197 @@
+import threading
+
+# =========================
+# LAYOUT INCRÉMENTAL
+# =========================
+# Même placement que layout_tree_svg (app.py), mais les positions sont
+# gardées entre deux modifications. Après une modification, seuls les
+# nœuds « sales » (le nœud touché et ses ancêtres) sont recalculés ; les
+# sous-arbres intacts sont sautés, ou simplement décalés s'ils sont à
+# droite de la modification.
+
+
+class TreeLayout:
+    def __init__(self, root, x_spacing=120, y_spacing=120, top_margin=60, left_margin=60):
+        self.root = root
+        self.x_spacing = x_spacing
+        self.y_spacing = y_spacing
+        self.top_margin = top_margin
+        self.left_margin = left_margin
+        self.lock = threading.Lock()
+
+        self.ids = {}        # node -> id stable
+        self.parent = {}     # node -> parent (racine -> None)
+        self.width = {}      # node -> nombre de feuilles du sous-arbre
+        self.slot = {}       # node -> (x_start, depth)
+        self.pos = {}        # node -> {"id", "label", "x", "y", "parent"}
+        self.levels = {}     # depth -> nombre de nœuds
+        self.next_id = 0
+
+        self.dirty = set()
+        self.changed = {}
+        self.removed = []
+        self._update()
+
+    # ---------- API ----------
+    def apply(self, touched=(), removed=()):
+        """
+        Recalcule après une modification de l'arbre.
+        touched : nœuds dont les enfants, la place ou l'étiquette ont changé ;
+        removed : nœuds retirés. Les nœuds et pas les valeurs : une valeur peut
+        apparaître plusieurs fois dans l'arbre.
+        Retourne le patch {"nodes", "removed", "w", "h"}, ou None si un nœud
+        est inconnu (layout périmé, à reconstruire).
+        """
+        with self.lock:
+            if any(n not in self.ids for n in (*removed, *touched)):
+                return None
+            for n in removed:
+                self._forget(n)
+            for n in touched:
+                self._touch(n)
+            return self._update()
+
+    def stats(self):
+        """(nombre de nœuds, hauteur) comme tree.stats, sans parcours."""
+        with self.lock:
+            return len(self.ids), (max(self.levels) + 1 if self.levels else 0)
+
+    def svg(self):
+        """Même format que layout_tree_svg : (nodes, edges, w, h)."""
+        with self.lock:
+            recs = list(self.pos.values())
+            w, h = self._size()
+        by_id = {r["id"]: r for r in recs}
+        nodes, edges = [], []
+        for r in recs:
+            nodes.append(dict(r, pos=0))
+            p = by_id.get(r["parent"])
+            if p is not None:
+                edges.append({"x1": p["x"], "y1": p["y"], "x2": r["x"], "y2": r["y"], "child": r["id"]})
+        return nodes, edges, w, h
+
+    # ---------- interne ----------
+    def _touch(self, node):
+        while node is not None and node not in self.dirty:
+            self.dirty.add(node)
+            node = self.parent.get(node)
+
+    def _forget(self, node):
+        self._touch(self.parent.get(node))
+        stack = [node]
+        while stack:
+            m = stack.pop()
+            if m not in self.ids:
+                continue
+            self.removed.append(self.ids.pop(m))
+            self._count_level(self.slot.pop(m)[1], -1)
+            self.pos.pop(m)
+            self.parent.pop(m, None)
+            self.width.pop(m, None)
+            self.dirty.discard(m)
+            c = m.first_child
+            while c:
+                stack.append(c)
+                c = c.next_sibling
+
+    def _count_level(self, depth, k):
+        self.levels[depth] = self.levels.get(depth, 0) + k
+        if not self.levels[depth]:
+            del self.levels[depth]
+
+    def _size(self):
+        if self.root is None:
+            return 500, 300
+        max_x = self.left_margin + (self.width[self.root] - 1) * self.x_spacing
+        max_y = self.top_margin + max(self.levels) * self.y_spacing
+        return int(max_x + 150), int(max_y + 200)
+
+    def _update(self):
+        if self.root is not None:
+            self._width(self.root)
+            self._place(self.root, None, 0, 0, False)
+        self.dirty.clear()
+        w, h = self._size()
+        patch = {"nodes": list(self.changed.values()), "removed": self.removed, "w": w, "h": h}
+        self.changed = {}
+        self.removed = []
+        return patch
+
+    def _width(self, n):
+        if n in self.width and n not in self.dirty:
+            return self.width[n]
+        w = 0
+        c = n.first_child
+        while c:
+            w += self._width(c)
+            c = c.next_sibling
+        self.width[n] = w or 1
+        return self.width[n]
+
+    def _place(self, n, p, x_start, depth, force):
+        old = self.slot.get(n)
+        if not force and old is not None and n not in self.dirty:
+            if old[1] == depth:
+                return self._shift(n, p, x_start - old[0])
+            force = True  # changement de profondeur : tout le sous-arbre bouge
+
+        if n not in self.ids:
+            self.ids[n] = self.next_id
+            self.next_id += 1
+        self.parent[n] = p
+        self.slot[n] = (x_start, depth)
+        if old is None:
+            self._count_level(depth, 1)
+        elif old[1] != depth:
+            self._count_level(old[1], -1)
+            self._count_level(depth, 1)
+
+        y = self.top_margin + depth * self.y_spacing
+        if n.first_child is None:
+            x = self.left_margin + x_start * self.x_spacing
+        else:
+            cur = x_start
+            centers = []
+            c = n.first_child
+            while c:
+                centers.append(self._place(c, n, cur, depth + 1, force))
+                cur += self.width[c]
+                c = c.next_sibling
+            x = sum(centers) / len(centers)
+
+        self._record(n, p, x, y)
+        return x
+
+    def _shift(self, n, p, dx):
+        # sous-arbre intact : même forme, seulement décalé de dx colonnes.
+        # x est recalculé depuis les colonnes entières (pas x + dx * x_spacing)
+        # pour retomber exactement sur les flottants de layout_tree_svg.
+        rec = self.pos[n]
+        if dx == 0:
+            if self.parent.get(n) is not p:
+                self.parent[n] = p
+                self._record(n, p, rec["x"], rec["y"])
+            return rec["x"]
+        self.parent[n] = p
+        x_start, depth = self.slot[n]
+        self.slot[n] = (x_start + dx, depth)
+        if n.first_child is None:
+            x = self.left_margin + (x_start + dx) * self.x_spacing
+        else:
+            centers = []
+            c = n.first_child
+            while c:
+                centers.append(self._shift(c, n, dx))
+                c = c.next_sibling
+            x = sum(centers) / len(centers)
+        self._record(n, p, x, rec["y"])
+        return x
+
+    def _record(self, n, p, x, y):
+        rec = {"id": self.ids[n], "label": n.value, "x": x, "y": y,
+               "parent": self.ids[p] if p is not None else None}
+        old = self.pos.get(n)
+        if old == rec:
+            return
+        self.pos[n] = rec
+        self.changed[n] = rec
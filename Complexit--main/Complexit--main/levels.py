@@ -0,0 +1,79 @@
+import numpy as np
+
+import metrics
+
+# =========================
+# INDEX DES NIVEAUX
+# =========================
+# Nœuds rangés dans l'ordre BFS : chaque niveau est une tranche contiguë,
+# et les descendants d'un nœud à un niveau donné aussi. Les pointeurs de
+# saut (up[j][i] = ancêtre 2^j de i) donnent le k-ième ancêtre en O(log k).
+
+
+class LevelIndex:
+    def __init__(self, root):
+        values, parent, _, degree = metrics.tree_to_arrays(root)
+        self.values = values
+        self.pos = {v: i for i, v in enumerate(values)}
+        self.bounds = metrics.level_bounds(degree)
+
+        n = len(values)
+        self.depth = np.empty(n, dtype=np.int64)
+        for d, (lo, hi) in enumerate(self.bounds):
+            self.depth[lo:hi] = d
+
+        # cstart[i] = rang BFS du premier enfant de i (ou de ceux qui suivent) ;
+        # les enfants de la tranche [lo, hi) sont la tranche [cstart[lo], cstart[hi])
+        self.cstart = np.ones(n + 1, dtype=np.int64)
+        np.cumsum(degree, out=self.cstart[1:])
+        self.cstart[1:] += 1
+
+        up = parent.copy()
+        if n:
+            up[0] = 0  # la racine est son propre ancêtre (jamais utilisé : k <= depth)
+        self.up = [up]
+        while (1 << len(self.up)) <= self.height():
+            self.up.append(self.up[-1][self.up[-1]])
+
+    def height(self):
+        """Profondeur maximale (racine = 0), -1 si l'arbre est vide."""
+        return len(self.bounds) - 1
+
+    def depth_of(self, value):
+        i = self.pos.get(value)
+        return None if i is None else int(self.depth[i])
+
+    def level(self, d):
+        """Valeurs des nœuds de profondeur d, dans l'ordre BFS."""
+        if d < 0 or d >= len(self.bounds):
+            return []
+        lo, hi = self.bounds[d]
+        return self.values[lo:hi]
+
+    def ancestor(self, value, k):
+        """k-ième ancêtre de value (k=0 : lui-même), ou None."""
+        i = self.pos.get(value)
+        if i is None or k < 0 or k > self.depth[i]:
+            return None
+        j = 0
+        while k:
+            if k & 1:
+                i = int(self.up[j][i])
+            k >>= 1
+            j += 1
+        return self.values[i]
+
+    def depth_range(self, value, a, b):
+        """[(profondeur, valeurs)] des descendants de value (inclus) de profondeur a..b."""
+        i = self.pos.get(value)
+        if i is None:
+            return None
+        res = []
+        lo, hi = i, i + 1
+        for d in range(int(self.depth[i]), min(b, self.height()) + 1):
+            if d >= a:
+                res.append((d, self.values[lo:hi]))
+            lo, hi = int(self.cstart[lo]), int(self.cstart[hi])
+            if lo == hi:
+                break
+        return res
@@ -0,0 +1,143 @@
+import csv
+from operator import attrgetter
+
+import numpy as np
+
+# =========================
+# MÉTRIQUES PAR NŒUD (NumPy)
+# =========================
+# L'arbre est converti une seule fois en tableaux indexés dans l'ordre BFS
+# (parent, premier fils, degré) ; toutes les métriques sont ensuite
+# calculées niveau par niveau sur des tranches contiguës.
+# Le parcours Python des nœuds chaînés domine (~1 s pour 10^6 nœuds) : l'appelant
+# peut garder le résultat de tree_to_arrays tant que l'arbre ne change pas.
+# La colonne address (une chaîne Python par nœud) est optionnelle.
+
+COLUMNS = ["value", "address", "parent", "depth", "subtree_size", "leaf_count",
+           "degree", "bfs_rank", "dfs_rank"]
+
+
+def tree_to_arrays(root):
+    """Retourne (values, parent, first_child, degree), index = rang BFS."""
+    if root is None:
+        e = np.zeros(0, dtype=np.int64)
+        return [], e, e.copy(), e.copy()
+
+    nodes = [root]
+    degree = []
+    add_node, add_degree = nodes.append, degree.append
+    # la liste grandit pendant le parcours : c'est la file du BFS
+    for n in nodes:
+        k = 0
+        c = n.first_child
+        while c:
+            add_node(c)
+            k += 1
+            c = c.next_sibling
+        add_degree(k)
+
+    values = list(map(attrgetter("value"), nodes))
+    degree = np.array(degree, dtype=np.int64)
+    # le nœud i apparaît degree[i] fois comme parent, dans l'ordre BFS
+    parent = np.concatenate(([-1], np.repeat(np.arange(len(degree)), degree)))
+    # les enfants d'un nœud sont contigus en BFS : ils commencent après
+    # tous les enfants des nœuds précédents
+    first_child = np.empty_like(degree)
+    first_child[0] = 1
+    np.cumsum(degree[:-1], out=first_child[1:])
+    first_child[1:] += 1
+    first_child[degree == 0] = -1
+    return values, parent, first_child, degree
+
+
+def level_bounds(degree):
+    """Liste des tranches [lo, hi) de chaque niveau dans l'ordre BFS."""
+    bounds = []
+    lo, hi = 0, min(1, len(degree))
+    while lo < hi:
+        bounds.append((lo, hi))
+        lo, hi = hi, hi + int(degree[lo:hi].sum())
+    return bounds
+
+
+def node_metrics(root, address=False, arrays=None):
+    """
+    Calcule les métriques de tous les nœuds ; retourne {colonne: tableau}.
+    address : ajoute la colonne des adresses R.x.y ; arrays : tree_to_arrays(root)
+    déjà calculé (évite de reparcourir l'arbre).
+    """
+    values, parent, first_child, degree = arrays or tree_to_arrays(root)
+    n = len(values)
+    bounds = level_bounds(degree)
+
+    depth = np.empty(n, dtype=np.int64)
+    for d, (lo, hi) in enumerate(bounds):
+        depth[lo:hi] = d
+
+    # tailles et feuilles : des niveaux profonds vers la racine
+    size = np.ones(n, dtype=np.int64)
+    leaves = (degree == 0).astype(np.int64)
+    for (plo, phi), (lo, hi) in zip(bounds[-2::-1], bounds[:0:-1]):
+        has = plo + np.flatnonzero(degree[plo:phi])
+        starts = first_child[has] - lo
+        size[has] += np.add.reduceat(size[lo:hi], starts)
+        leaves[has] = np.add.reduceat(leaves[lo:hi], starts)
+
+    # rang parmi les frères et rang préfixe (DFS)
+    sib = np.zeros(n, dtype=np.int64)
+    dfs_rank = np.zeros(n, dtype=np.int64)
+    for lo, hi in bounds[1:]:
+        p = parent[lo:hi]
+        start = first_child[p]
+        sib[lo:hi] = np.arange(lo, hi) - start
+        before = np.cumsum(size[lo:hi]) - size[lo:hi]
+        dfs_rank[lo:hi] = dfs_rank[p] + 1 + before - before[start - lo]
+
+    cols = {
+        "value": np.array(values, dtype=object),
+        "parent": parent,
+        "depth": depth,
+        "subtree_size": size,
+        "leaf_count": leaves,
+        "degree": degree,
+        "bfs_rank": np.arange(n, dtype=np.int64),
+        "dfs_rank": dfs_rank,
+    }
+    if address:
+        cols["address"] = addresses(parent, sib, bounds)
+    return cols
+
+
+def addresses(parent, sib, bounds):
+    """Adresses R.x.y niveau par niveau (tableau d'objets str)."""
+    addr = np.empty(len(parent), dtype=object)
+    if len(addr):
+        addr[0] = "R"
+    for lo, hi in bounds[1:]:
+        # concaténation de chaînes : reste une boucle Python par nœud
+        addr[lo:hi] = addr[parent[lo:hi]] + np.array(
+            ["." + str(s) for s in sib[lo:hi].tolist()], dtype=object)
+    return addr
+
+
+def columns(cols):
+    """Colonnes présentes dans cols, dans l'ordre de COLUMNS."""
+    return [c for c in COLUMNS if c in cols]
+
+
+def to_csv(cols, f):
+    """
+    Écrit les colonnes dans le fichier texte f (une ligne par nœud).
+    Formatage ligne par ligne en Python : ~2 s pour 10^6 nœuds, le .npz est
+    bien plus rapide pour les gros arbres.
+    """
+    names = columns(cols)
+    w = csv.writer(f)
+    w.writerow(names)
+    w.writerows(zip(*(cols[c].tolist() for c in names)))
+
+
+def to_npz(cols, f):
+    """Écrit un .npz : un tableau .npy par colonne."""
+    np.savez(f, **{c: (cols[c].astype(str) if cols[c].dtype == object else cols[c])
+                   for c in columns(cols)})
@@ -0,0 +1,205 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+import zlib
+from multiprocessing import Process
+from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qs, quote
+from urllib.request import Request, urlopen
+
+from flask import Flask, Response, request
+
+# =========================
+# MODE RÉPARTI
+# =========================
+# Les arbres sont partagés par nom entre N processus workers (chacun avec
+# son propre trees_shardI.json) ; un routeur renvoie chaque requête au
+# worker propriétaire de l'arbre via HTTP local. Au démarrage, les fichiers
+# sont repartitionnés selon le nombre de shards courant (voir rebalance).
+
+HOST = "127.0.0.1"
+TREE_FIELDS = ("name", "tree_name")
+PATH_NAMES = ("events/", "api/trees/")   # routes /<prefixe><nom de l'arbre>
+# en-têtes propres à une connexion HTTP : jamais relayés tels quels
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+              "te", "trailer", "trailers", "transfer-encoding", "upgrade"}
+
+
+def shard_for(name, n):
+    # crc32 et pas hash() : la valeur doit être la même dans tous les processus
+    return zlib.crc32(name.encode("utf-8")) % n
+
+
+def data_file(data_dir, i):
+    return os.path.join(data_dir, f"trees_shard{i}.json")
+
+
+def rebalance(data_dir, n):
+    """
+    Range chaque arbre dans le fichier du shard qui le possède pour n shards.
+    Lit tous les trees_shard*.json (le nombre de shards a pu changer) et, au
+    premier démarrage en mode réparti (aucun fichier de shard), trees.json.
+    Si un nom apparaît deux fois, la version modifiée le plus récemment gagne.
+    Retourne le nombre d'arbres déplacés.
+    """
+    files = sorted(glob.glob(os.path.join(data_dir, "trees_shard*.json")))
+    sources = files or [os.path.join(data_dir, "trees.json")]
+    found = {}   # name -> (fichier d'origine, données)
+    total = 0
+    for path in sources:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for name, data in json.load(f).items():
+                total += 1
+                cur = found.get(name)
+                if cur is None or data.get("modified", 0) > cur[1].get("modified", 0):
+                    found[name] = (path, data)
+
+    parts = [{} for _ in range(n)]
+    moved = 0
+    for name, (path, data) in found.items():
+        i = shard_for(name, n)
+        parts[i][name] = data
+        moved += path != data_file(data_dir, i)
+    wanted = {data_file(data_dir, i) for i in range(n)}
+    if not moved and set(files) <= wanted and total == len(found):
+        return 0
+
+    # nouveaux fichiers d'abord (écriture atomique), anciens ensuite :
+    # une interruption laisse au pire un doublon, jamais une perte
+    for i, part in enumerate(parts):
+        tmp = data_file(data_dir, i) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(part, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, data_file(data_dir, i))
+    for path in set(files) - wanted:
+        os.remove(path)
+    return moved
+
+
+def run_worker(i, port, peers, data_dir, quiet=False):
+    if quiet:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    os.environ["TREELAB_DATA"] = data_file(data_dir, i)
+    os.environ["TREELAB_PEERS"] = ",".join(peers)
+    import app  # import après l'env : load_trees() lit TREELAB_DATA
+    app.app.run(host=HOST, port=port, threaded=True)
+
+
+def tree_name_of(body):
+    form = parse_qs(body.decode("utf-8", "replace"))
+    for f in TREE_FIELDS:
+        v = form.get(f, [""])[0].strip()
+        if v:
+            return v
+    return None
+
+
+def make_router(ports):
+    router = Flask(__name__)
+    n = len(ports)
+    # /build : les étapes suivant "start" n'envoient plus le nom de l'arbre
+    state = {"build": 0}
+
+    @router.route("/", defaults={"path": ""}, methods=["GET", "POST"])
+    @router.route("/<path:path>", methods=["GET", "POST"])
+    def forward(path):
+        body = request.get_data()
+        name = tree_name_of(body) if request.method == "POST" else None
+        for prefix in PATH_NAMES:
+            if path.startswith(prefix):
+                name = path[len(prefix):]
+
+        if path == "build":
+            if name is not None:
+                state["build"] = shard_for(name, n)
+            i = state["build"]
+        elif name is not None:
+            i = shard_for(name, n)
+        else:
+            i = 0
+
+        url = f"http://{HOST}:{ports[i]}/{quote(path)}"
+        if request.query_string:
+            url += "?" + request.query_string.decode("latin-1")
+
+        headers = {}
+        if request.content_type:
+            headers["Content-Type"] = request.content_type
+        req = Request(url, data=body if request.method == "POST" else None,
+                      headers=headers, method=request.method)
+        try:
+            resp = urlopen(req, timeout=60)
+        except HTTPError as e:
+            resp = e
+        except (URLError, OSError) as e:  # shard arrêté, refus de connexion, délai dépassé
+            return Response(f"❌ Shard {i} injoignable : {e}", status=502,
+                            content_type="text/plain; charset=utf-8")
+        headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in HOP_BY_HOP]
+        if resp.headers.get("Content-Type", "").startswith("text/event-stream"):
+            return Response(stream(resp), status=resp.status, headers=headers)
+        with resp:
+            return Response(resp.read(), status=resp.status, headers=headers)
+
+    return router
+
+
+def stream(resp):
+    # SSE : on relaie ligne par ligne au lieu d'attendre la fin de la réponse
+    with resp:
+        for line in resp:
+            yield line
+
+
+def wait_ready(port, timeout=30):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            urlopen(f"http://{HOST}:{port}/", timeout=1).close()
+            return True
+        except (URLError, OSError):
+            time.sleep(0.1)
+    return False
+
+
+def start_shards(n, port, data_dir=".", quiet=False):
+    """Démarre n workers sur port+1..port+n ; retourne (processus, ports)."""
+    moved = rebalance(data_dir, n)
+    if moved and not quiet:
+        print(f"{moved} arbre(s) déplacé(s) vers leur shard ({n} shards)")
+    ports = [port + 1 + i for i in range(n)]
+    urls = [f"http://{HOST}:{p}" for p in ports]
+    procs = []
+    for i, p in enumerate(ports):
+        peers = [u for j, u in enumerate(urls) if j != i]
+        proc = Process(target=run_worker, args=(i, p, peers, data_dir, quiet), daemon=True)
+        proc.start()
+        procs.append(proc)
+    for p in ports:
+        wait_ready(p)
+    return procs, ports
+
+
+def run_router(port, ports, quiet=False):
+    if quiet:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_router(ports).run(host=HOST, port=port, threaded=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="TreeLab en mode réparti")
+    ap.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--port", type=int, default=5000)
+    ap.add_argument("--data-dir", default=".")
+    args = ap.parse_args()
+
+    procs, ports = start_shards(args.shards, args.port, args.data_dir)
+    try:
+        run_router(args.port, ports)
+    finally:
+        for p in procs:
+            p.terminate()
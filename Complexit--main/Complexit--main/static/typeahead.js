@@ -0,0 +1,24 @@
+// Saisie assistée des noms d'arbres : interroge /api/trees au fil de la frappe
+document.querySelectorAll("input[data-typeahead]").forEach((input, i) => {
+  const list = document.createElement("datalist");
+  list.id = "typeahead-" + i;
+  input.setAttribute("list", list.id);
+  input.setAttribute("autocomplete", "off");
+  input.after(list);
+
+  let timer = null;
+  const refresh = () => {
+    fetch("/api/trees?limit=20&prefix=" + encodeURIComponent(input.value.trim()))
+      .then(r => r.json())
+      .then(data => {
+        list.replaceChildren(...data.items.map(t => {
+          const o = document.createElement("option");
+          o.value = t.name;
+          o.label = `ordre ${t.order} · ${t.nodes} nœuds · hauteur ${t.height}`;
+          return o;
+        }));
+      });
+  };
+  input.addEventListener("input", () => { clearTimeout(timer); timer = setTimeout(refresh, 150); });
+  input.addEventListener("focus", refresh);
+});
@@ -0,0 +1,66 @@
+import os
+import random
+import tempfile
+
+# app lit TREELAB_DATA à l'import : on travaille dans un fichier jetable
+os.environ["TREELAB_DATA"] = os.path.join(tempfile.mkdtemp(), "trees.json")
+
+import app  # noqa: E402
+import tree  # noqa: E402
+
+# =========================
+# LAYOUT INCRÉMENTAL == LAYOUT COMPLET
+# =========================
+# Suites aléatoires d'insertions / renommages / suppressions / déplacements /
+# copies passées par les routes ; après chaque étape, le layout incrémental
+# doit donner exactement les mêmes positions que layout_tree_svg.
+
+NAME = "t"
+LABELS = "ABCDEFGH"   # peu de valeurs : /insert crée des doublons
+
+
+def canon(nodes, edges, w, h):
+    # les ids diffèrent entre les deux layouts : on compare étiquettes et positions
+    return (sorted((n["label"], n["x"], n["y"]) for n in nodes),
+            sorted((e["x1"], e["y1"], e["x2"], e["y2"]) for e in edges), w, h)
+
+
+def check(rng):
+    app.trees.clear()
+    app.tree_orders.clear()
+    app.layouts.clear()
+    root = tree.Node("R")
+    app.trees[NAME] = root
+    app.tree_orders[NAME] = rng.choice([0, 3])
+    app.tree_changed(NAME)
+    lay = app.get_layout(NAME)
+    client = app.app.test_client()
+
+    for _ in range(60):
+        op = rng.choice(["insert", "insert", "insert", "edit", "delete", "move", "copy"])
+        vs = tree.bfs(app.trees[NAME])
+        a, b = rng.choice(vs), rng.choice(vs)
+        if op == "insert":
+            client.post("/insert", data={"name": NAME, "parent": a, "new": rng.choice(LABELS)})
+        elif op == "edit":
+            client.post("/edit", data={"tree_name": NAME, "old_val": a,
+                                       "new_val": rng.choice(LABELS) + str(rng.randrange(100))})
+        elif op == "delete":
+            client.post("/delete", data={"tree_name": NAME, "value": a})
+        else:
+            client.post("/restructure", data={"op": op, "tree_name": NAME, "value": a,
+                                              "target": b, "suffix": "'"})
+
+        assert app.layouts[NAME] is lay, "layout reconstruit au lieu d'être mis à jour"
+        assert canon(*lay.svg()) == canon(*app.layout_tree_svg(app.trees[NAME]))
+        assert lay.stats() == tree.stats(app.trees[NAME])
+
+
+def test_incremental_layout_matches_full_layout():
+    for seed in range(40):
+        check(random.Random(seed))
+
+
+if __name__ == "__main__":
+    test_incremental_layout_matches_full_layout()
+    print("ok")
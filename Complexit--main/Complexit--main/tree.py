@@ -115,3 +115,174 @@ def dfs(root):
             c = c.next_sibling
     rec(root)
     return res
+
+
+# =========================
+# RESTRUCTURATION (déplacer / copier / greffer)
+# =========================
+def find_with_links(root, value):
+    # Retourne (parent, prev, node) : prev = frère précédent de node (None si premier fils)
+    if root is None:
+        return None, None, None
+    if root.value == value:
+        return None, None, root
+    stack = [root]
+    while stack:
+        n = stack.pop()
+        prev = None
+        c = n.first_child
+        while c:
+            if c.value == value:
+                return n, prev, c
+            stack.append(c)
+            prev = c
+            c = c.next_sibling
+    return None, None, None
+
+
+def unlink(parent, prev, node):
+    # O(1) : retire node de la chaîne des frères
+    if prev is None:
+        parent.first_child = node.next_sibling
+    else:
+        prev.next_sibling = node.next_sibling
+    node.next_sibling = None
+
+
+def append_child(parent, node):
+    # Raccroche node (et tout son sous-arbre) comme dernier fils de parent
+    node.next_sibling = None
+    if parent.first_child is None:
+        parent.first_child = node
+    else:
+        cur = parent.first_child
+        while cur.next_sibling:
+            cur = cur.next_sibling
+        cur.next_sibling = node
+
+
+def values(node):
+    res = set()
+    stack = [node] if node else []
+    while stack:
+        n = stack.pop()
+        res.add(n.value)
+        c = n.first_child
+        while c:
+            stack.append(c)
+            c = c.next_sibling
+    return res
+
+
+def max_degree(node):
+    m = 0
+    stack = [node] if node else []
+    while stack:
+        n = stack.pop()
+        k = 0
+        c = n.first_child
+        while c:
+            k += 1
+            stack.append(c)
+            c = c.next_sibling
+        m = max(m, k)
+    return m
+
+
+def clone(node, suffix=""):
+    new = Node(node.value + suffix)
+    prev = None
+    c = node.first_child
+    while c:
+        cc = clone(c, suffix)
+        if prev is None:
+            new.first_child = cc
+        else:
+            prev.next_sibling = cc
+        prev = cc
+        c = c.next_sibling
+    return new
+
+
+def _check_attach(dest, sub, max_n):
+    if max_n > 0 and count_children(dest) >= max_n:
+        return f"❌ Ordre {max_n} atteint pour {dest.value}"
+    if max_n > 0 and max_degree(sub) > max_n:
+        return f"❌ Le sous-arbre {sub.value} dépasse l'ordre {max_n}"
+    return None
+
+
+def move_subtree(root, value, new_parent_value, max_n):
+    parent, prev, node = find_with_links(root, value)
+    if node is None:
+        return False, "❌ Nœud introuvable"
+    if parent is None:
+        return False, "❌ Impossible de déplacer la racine"
+    if search(node, new_parent_value):
+        return False, "❌ La destination est dans le sous-arbre déplacé"
+
+    dest = search(root, new_parent_value)
+    if dest is None:
+        return False, "Parent introuvable"
+    if dest is not parent and max_n > 0 and count_children(dest) >= max_n:
+        return False, f"❌ Ordre {max_n} atteint pour {new_parent_value}"
+
+    unlink(parent, prev, node)
+    append_child(dest, node)
+    return True, f"✔ {value} déplacé sous {new_parent_value}"
+
+
+def copy_subtree(src_root, value, dst_root, dst_parent_value, max_n, suffix=""):
+    node = search(src_root, value)
+    if node is None:
+        return False, "❌ Nœud introuvable"
+    dest = search(dst_root, dst_parent_value)
+    if dest is None:
+        return False, "Parent introuvable"
+
+    err = _check_attach(dest, node, max_n)
+    if err:
+        return False, err
+
+    copy = clone(node, suffix)
+    clash = values(copy) & values(dst_root)
+    if clash:
+        return False, f"❌ Valeur déjà utilisée : {sorted(clash)[0]}"
+
+    append_child(dest, copy)
+    return True, f"✔ {value} copié sous {dst_parent_value}"
+
+
+def graft_tree(root, parent_value, other, max_n):
+    if other is None or other is root:
+        return False, "❌ Impossible de greffer un arbre sur lui-même"
+    dest = search(root, parent_value)
+    if dest is None:
+        return False, "Parent introuvable"
+
+    err = _check_attach(dest, other, max_n)
+    if err:
+        return False, err
+
+    clash = values(other) & values(root)
+    if clash:
+        return False, f"❌ Valeur déjà utilisée : {sorted(clash)[0]}"
+
+    append_child(dest, other)
+    return True, f"✔ Arbre {other.value} greffé sous {parent_value}"
+
+
+def stats(node):
+    # (nombre de nœuds, hauteur) en un seul parcours ; hauteur d'une feuille = 1
+    count = 0
+    h = 0
+    stack = [(node, 1)] if node else []
+    while stack:
+        n, d = stack.pop()
+        count += 1
+        h = max(h, d)
+        c = n.first_child
+        while c:
+            stack.append((c, d + 1))
+            c = c.next_sibling
+    return count, h